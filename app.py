@@ -13,6 +13,10 @@ import os
 import json
 from datetime import datetime
 import uuid
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
 
 # Configuração da aplicação
 app = Flask(__name__)
@@ -475,6 +479,167 @@ def chat_api():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+# Geração de respostas (fallback do process_message)
+class GeradorTexto:
+    """Interface de gerador: recebe um lote de prompts e devolve um texto por prompt"""
+
+    def gerar_lote(self, prompts):
+        raise NotImplementedError
+
+class GeradorLocal(GeradorTexto):
+    """Modelo local substituto, usado para testes e enquanto não há modelo real"""
+
+    def gerar_lote(self, prompts):
+        return [resposta_padrao(prompt) for prompt in prompts]
+
+class FilaCheiaError(Exception):
+    """Fila do micro-batcher atingiu o limite de profundidade"""
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes em uma única chamada ao gerador
+
+    Coleta pedidos por até `janela_ms` milissegundos ou `max_lote` itens,
+    executa uma chamada em lote e devolve cada resultado via Future.
+    """
+
+    def __init__(self, gerador, janela_ms=10, max_lote=16, max_fila=256, timeout=5.0):
+        self.gerador = gerador
+        self.janela = janela_ms / 1000.0
+        self.max_lote = max_lote
+        self.timeout = timeout
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._metricas = {
+            'lotes': 0,
+            'requisicoes': 0,
+            'maior_lote': 0,
+            'rejeitadas': 0,
+            'timeouts': 0,
+            'erros': 0,
+            'latencia_lote_total': 0.0,
+            'espera_fila_total': 0.0,
+        }
+
+    def _garantir_worker(self):
+        """Inicia (ou reinicia) a thread de processamento sob demanda"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name='iaon-microbatch', daemon=True)
+                self._worker.start()
+
+    def submeter(self, prompt):
+        """Enfileira um prompt e retorna o Future com o resultado"""
+        future = Future()
+        self._garantir_worker()
+        try:
+            self._fila.put_nowait((prompt, future, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._metricas['rejeitadas'] += 1
+            raise FilaCheiaError(f'Fila de geração cheia ({self._fila.maxsize} pedidos)')
+        return future
+
+    def gerar(self, prompt, timeout=None):
+        """Enfileira um prompt e aguarda o resultado"""
+        future = self.submeter(prompt)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._metricas['timeouts'] += 1
+            raise
+
+    def _loop(self):
+        while True:
+            lote = [self._fila.get()]
+            prazo = time.monotonic() + self.janela
+            while len(lote) < self.max_lote:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._executar(lote)
+
+    def _executar(self, lote):
+        # Descartar pedidos cancelados por timeout enquanto aguardavam na fila
+        ativos = [item for item in lote if item[1].set_running_or_notify_cancel()]
+        if not ativos:
+            return
+
+        inicio = time.monotonic()
+        try:
+            resultados = self.gerador.gerar_lote([prompt for prompt, _, _ in ativos])
+            if len(resultados) != len(ativos):
+                raise ValueError(f'Gerador retornou {len(resultados)} resultados para {len(ativos)} prompts')
+        except Exception as e:
+            for _, future, _ in ativos:
+                future.set_exception(e)
+            with self._lock:
+                self._metricas['erros'] += 1
+            return
+        fim = time.monotonic()
+
+        for (_, future, _), resultado in zip(ativos, resultados):
+            future.set_result(resultado)
+
+        with self._lock:
+            self._metricas['lotes'] += 1
+            self._metricas['requisicoes'] += len(ativos)
+            self._metricas['maior_lote'] = max(self._metricas['maior_lote'], len(ativos))
+            self._metricas['latencia_lote_total'] += fim - inicio
+            self._metricas['espera_fila_total'] += sum(inicio - enfileirado for _, _, enfileirado in ativos)
+
+    def metricas(self):
+        """Retorna um resumo das métricas de lote e latência"""
+        with self._lock:
+            m = dict(self._metricas)
+        lotes = m.pop('lotes')
+        requisicoes = m.pop('requisicoes')
+        latencia_total = m.pop('latencia_lote_total')
+        espera_total = m.pop('espera_fila_total')
+        m.update({
+            'lotes': lotes,
+            'requisicoes': requisicoes,
+            'tamanho_medio_lote': requisicoes / lotes if lotes else 0.0,
+            'latencia_media_lote_ms': latencia_total / lotes * 1000 if lotes else 0.0,
+            'espera_media_fila_ms': espera_total / requisicoes * 1000 if requisicoes else 0.0,
+            'fila_atual': self._fila.qsize(),
+        })
+        return m
+
+def resposta_padrao(message):
+    """Resposta modelo para mensagens sem palavra-chave"""
+    return f"""🤔 Interessante pergunta sobre "{message}"! 
+
+Como assistente IA, posso ajudá-lo com:
+• 💬 Conversas e informações gerais
+• 🕐 Horário e data atual  
+• 🤖 Explicações sobre IA e tecnologia
+• 😄 Piadas e entretenimento
+• 🆘 Ajuda e comandos disponíveis
+
+🌍 Funcionando globalmente via Vercel com HTTPS seguro!
+
+Digite "ajuda" para ver todos os comandos disponíveis."""
+
+def configurar_gerador(gerador):
+    """Substitui o gerador usado no fallback do process_message"""
+    gerador_lote.gerador = gerador
+
+# Configuração do micro-batching
+gerador_lote = MicroBatcher(
+    GeradorLocal(),
+    janela_ms=float(os.environ.get('IAON_BATCH_WINDOW_MS', '10')),
+    max_lote=int(os.environ.get('IAON_BATCH_MAX_SIZE', '16')),
+    max_fila=int(os.environ.get('IAON_BATCH_MAX_QUEUE', '256')),
+    timeout=float(os.environ.get('IAON_BATCH_TIMEOUT', '5')),
+)
+
 def process_message(message):
     """Processar mensagem do usuário"""
     message_lower = message.lower()
@@ -541,18 +706,12 @@ Agora você pode acessar de qualquer lugar do mundo com segurança total!
         return "👋 Até logo! Foi um prazer ajudá-lo. Volte sempre - estarei aqui 24/7 no Vercel!"
     
     else:
-        return f"""🤔 Interessante pergunta sobre "{message}"! 
-
-Como assistente IA, posso ajudá-lo com:
-• 💬 Conversas e informações gerais
-• 🕐 Horário e data atual  
-• 🤖 Explicações sobre IA e tecnologia
-• 😄 Piadas e entretenimento
-• 🆘 Ajuda e comandos disponíveis
-
-🌍 Funcionando globalmente via Vercel com HTTPS seguro!
-
-Digite "ajuda" para ver todos os comandos disponíveis."""
+        # Sem palavra-chave: encaminhar ao gerador via micro-batching
+        try:
+            return gerador_lote.gerar(message)
+        except Exception as e:
+            print(f"Erro na geração em lote: {e}")
+            return resposta_padrao(message)
 
 def save_conversation(message, response):
     """Salvar conversa no banco de dados"""
@@ -636,6 +795,7 @@ def health():
         'status': 'healthy',
         'service': 'IAON Universal',
         'platform': 'Vercel',
+        'generation': gerador_lote.metricas(),
         'timestamp': datetime.now().isoformat()
     })
 